@@ -1,22 +1,52 @@
 from fastapi import FastAPI, HTTPException, Header, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field, validator
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 from typing import Literal
+from contextlib import asynccontextmanager
+import asyncio
 import os
+import librosa
+import numpy as np
+import pyfftw
+from blake3 import blake3
+from cachetools import TTLCache
 from dotenv import load_dotenv
 
-from model import voice_detector
-from utils import decode_base64_audio, extract_audio_features
+from model import VoiceDetectionModel
+from utils import decode_base64_audio, resample_audio
+
+# Route librosa's FFTs through pyFFTW and keep plans cached, so repeat
+# requests with the same STFT shape reuse their plan instead of re-planning.
+# librosa dispatches through its own fftlib (numpy.fft by default), so the
+# documented set_fftlib hook is the one that actually reaches the STFTs.
+# One FFT thread per worker: requests already run in parallel across threads.
+pyfftw.config.NUM_THREADS = 1
+pyfftw.interfaces.cache.enable()
+pyfftw.interfaces.cache.set_keepalive_time(3600)
+librosa.set_fftlib(pyfftw.interfaces.numpy_fft)
 
 # Load environment variables
 load_dotenv()
 API_KEY = os.getenv("API_KEY", "your-secret-key-here")
 
+# Content-hash cache: identical audio (retries, demos, tests) skips the pipeline
+result_cache = TTLCache(maxsize=1024, ttl=3600)
+
+# Model lifecycle: load at startup and warm up so the first request is fast
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.detector = VoiceDetectionModel()
+    app.state.detector.predict(np.zeros(16000, dtype=np.float32), 16000)
+    yield
+
 # Initialize FastAPI
 app = FastAPI(
     title="AI Voice Detection API",
     description="Detect AI-generated vs Human voices",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware
@@ -30,11 +60,14 @@ app.add_middleware(
 
 # Request Model
 class VoiceDetectionRequest(BaseModel):
+    model_config = ConfigDict(extra='forbid')
+
     language: Literal["Tamil", "English", "Hindi", "Malayalam", "Telugu"]
     audioFormat: Literal["mp3"]
     audioBase64: str = Field(..., min_length=100)
-    
-    @validator('audioBase64')
+
+    @field_validator('audioBase64')
+    @classmethod
     def validate_base64(cls, v):
         if len(v) < 100:
             raise ValueError("Audio Base64 string too short")
@@ -52,6 +85,12 @@ class ErrorResponse(BaseModel):
     status: str
     message: str
 
+# Blocking decode -> feature -> predict pipeline, run off the event loop
+def run_pipeline(audio_base64: str) -> tuple:
+    waveform, sample_rate = decode_base64_audio(audio_base64)
+    waveform, sr = resample_audio(waveform, sample_rate)
+    return app.state.detector.predict(waveform, sr)
+
 # API Key Validation
 async def verify_api_key(x_api_key: str = Header(...)):
     if x_api_key != API_KEY:
@@ -83,17 +122,21 @@ async def detect_voice(
     - **audioBase64**: Base64-encoded MP3 audio file
     """
     try:
-        # Decode audio
-        waveform, sample_rate = decode_base64_audio(request.audioBase64)
-        
-        # Extract features
-        features, waveform, sr = extract_audio_features(waveform, sample_rate)
-        
-        # Run prediction
-        classification, confidence, explanation = voice_detector.predict(
-            waveform, sr
-        )
-        
+        # Check the content-hash cache before running the pipeline
+        cache_key = blake3(request.audioBase64.encode()).digest()
+        cached = result_cache.get(cache_key)
+
+        if cached is not None:
+            classification, confidence, explanation = cached
+        else:
+            # Run the blocking pipeline in a worker thread so the event
+            # loop keeps accepting connections while audio is processed
+            classification, confidence, explanation = await asyncio.to_thread(
+                run_pipeline, request.audioBase64
+            )
+
+            result_cache[cache_key] = (classification, confidence, explanation)
+
         return VoiceDetectionResponse(
             status="success",
             language=request.language,
@@ -131,8 +174,12 @@ async def health_check():
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
-        app,
+        "main:app",
         host="0.0.0.0",
         port=8000,
+        workers=int(os.getenv("WEB_WORKERS", 2 * os.cpu_count() + 1)),
+        limit_concurrency=int(os.getenv("LIMIT_CONCURRENCY", 16)),
+        loop="uvloop",
+        http="httptools",
         log_level="info"
     )
@@ -1,103 +1,162 @@
+import logging
+import os
+import threading
 import numpy as np
 import librosa
+import numba
+import pyworld
+from blake3 import blake3
+from cachetools import LRUCache
 from typing import Tuple
 
+logger = logging.getLogger(__name__)
+
+# Fast path: skip spectral analysis when pitch variation alone is decisive
+FAST_PATH_ENABLED = os.getenv("FAST_PATH_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Pitch-variation buckets -> base AI score (LOW pitch = HIGH AI score);
+# searchsorted lookup keeps the scoring branchless and batch-friendly
+_PITCH_THRESHOLDS = np.array([15.0, 30.0, 50.0, 70.0, 90.0, 120.0])
+_PITCH_SCORES = np.array([0.85, 0.75, 0.65, 0.55, 0.45, 0.30, 0.20])
+
+# Eager signature: compiled at import for pyworld's contiguous float64 f0,
+# so no request ever pays the JIT cost
+@numba.njit("float64(float64[::1])", cache=True, fastmath=True)
+def _pitch_std(f0):
+    """Std of voiced frames (50-500 Hz) via one Welford pass, no allocations"""
+    n = 0
+    mean = 0.0
+    m2 = 0.0
+    for p in f0:
+        if 50.0 < p < 500.0:
+            n += 1
+            delta = p - mean
+            mean += delta / n
+            m2 += delta * (p - mean)
+    return np.sqrt(m2 / n) if n > 10 else 0.0
+
 class VoiceDetectionModel:
     def __init__(self):
         """Initialize lightweight model"""
-        print("Loading lightweight voice detector...")
-        print("Model ready!")
-    
+        logger.info("Loading lightweight voice detector...")
+        # cachetools caches are not thread-safe and predict runs on
+        # asyncio.to_thread worker threads, so guard every access
+        self._feature_cache = LRUCache(maxsize=512)
+        self._feature_cache_lock = threading.Lock()
+        logger.info("Model ready!")
+
     def predict(self, waveform: np.ndarray, sr: int) -> Tuple[str, float, str]:
         """Predict using heuristics only"""
-        
-        # Calculate heuristics
-        pitch_std, spectral_centroid, zcr = self._extract_features(waveform, sr)
-        
+
+        # Calculate heuristics (cached by waveform content hash, so repeat
+        # audio skips the feature extraction entirely)
+        cache_key = (blake3(waveform.tobytes()).digest(), sr)
+        with self._feature_cache_lock:
+            features = self._feature_cache.get(cache_key)
+        if features is None:
+            pitch_std = self._fast_pitch_std(waveform, sr)
+            if FAST_PATH_ENABLED and (pitch_std < 30 or pitch_std > 150):
+                # Pitch alone is decisive here; skip the STFT work
+                # (None marks features that were never computed)
+                features = {
+                    'pitch_std': pitch_std,
+                    'spectral_centroid': None,
+                    'zero_crossing_rate': None
+                }
+            else:
+                features = self._extract_features(waveform, sr, pitch_std)
+            with self._feature_cache_lock:
+                self._feature_cache[cache_key] = features
+
         # Score based on heuristics
-        ai_score = self._calculate_ai_score(pitch_std, spectral_centroid, zcr)
-        
-        print(f"DEBUG: Pitch={pitch_std:.1f} Hz, AI_Score={ai_score:.2f}")
-        
+        ai_score = self._calculate_ai_score(features)
+
+        # Lazy %-formatting: no string is built unless DEBUG is enabled
+        logger.debug("Pitch=%.1f Hz, AI_Score=%.2f", features['pitch_std'], ai_score)
+
         # Classify
         is_ai_generated = ai_score > 0.5
         classification = "AI_GENERATED" if is_ai_generated else "HUMAN"
         confidence = ai_score if is_ai_generated else (1 - ai_score)
-        
-        # Generate explanation
+
+        # Generate explanation from the same features (nothing is recomputed)
         explanation = self._generate_explanation(
-            is_ai_generated, 
+            is_ai_generated,
             confidence,
-            pitch_std,
-            spectral_centroid
+            features
         )
-        
+
         return classification, round(confidence, 2), explanation
     
-    def _extract_features(self, waveform: np.ndarray, sr: int):
-        """Extract audio features"""
+    def _fast_pitch_std(self, waveform: np.ndarray, sr: int):
+        """Pitch std via pyworld (DIO + stonemask is much faster than piptrack)"""
+        try:
+            waveform_f64 = waveform.astype(np.float64)
+            f0, t = pyworld.dio(waveform_f64, sr, frame_period=10.0)
+            f0 = pyworld.stonemask(waveform_f64, f0, t, sr)
+
+            return _pitch_std(f0)
+        except Exception as e:
+            logger.warning("Pitch extraction error: %s", e)
+            return 0
+
+    def _extract_features(self, waveform: np.ndarray, sr: int, pitch_std) -> dict:
+        """Extract spectral features (pitch_std already computed)"""
         try:
             zcr = np.mean(librosa.feature.zero_crossing_rate(waveform))
-            spectral_centroid = np.mean(librosa.feature.spectral_centroid(y=waveform, sr=sr))
-            
-            # Calculate pitch
-            pitches, magnitudes = librosa.piptrack(y=waveform, sr=sr)
-            pitch_values = []
-            for t in range(pitches.shape[1]):
-                index = magnitudes[:, t].argmax()
-                pitch = pitches[index, t]
-                if 50 < pitch < 500:
-                    pitch_values.append(pitch)
-            
-            pitch_std = np.std(pitch_values) if len(pitch_values) > 10 else 0
-            
-            return pitch_std, spectral_centroid, zcr
+
+            # Compute the STFT magnitude once and share it across feature calls
+            S = np.abs(librosa.stft(waveform, n_fft=2048, hop_length=512))
+            spectral_centroid = np.mean(librosa.feature.spectral_centroid(S=S, sr=sr))
+
+            return {
+                'pitch_std': pitch_std,
+                'spectral_centroid': spectral_centroid,
+                'zero_crossing_rate': zcr
+            }
         except Exception as e:
-            print(f"Feature extraction error: {e}")
-            return 0, 0, 0
+            logger.warning("Feature extraction error: %s", e)
+            return {
+                'pitch_std': pitch_std,
+                'spectral_centroid': None,
+                'zero_crossing_rate': None
+            }
     
-    def _calculate_ai_score(self, pitch_std, spectral_centroid, zcr):
+    def _calculate_ai_score(self, features: dict):
         """Calculate AI probability - LOW pitch = HIGH AI score"""
-        ai_score = 0.0
-        
-        # Pitch variation - CRITICAL INDICATOR
-        if pitch_std < 15:
-            ai_score = 0.85      # Definitely AI
-        elif pitch_std < 30:
-            ai_score = 0.75      # Very likely AI
-        elif pitch_std < 50:     # ← 46 Hz hits here
-            ai_score = 0.65      # Likely AI
-        elif pitch_std < 70:
-            ai_score = 0.55      # Maybe AI
-        elif pitch_std < 90:
-            ai_score = 0.45      # Borderline
-        elif pitch_std < 120:
-            ai_score = 0.30      # Probably human
-        else:
-            ai_score = 0.20      # Likely human
-        
-        # Additional adjustments
+        pitch_std = features['pitch_std']
+        spectral_centroid = features['spectral_centroid']
+        zcr = features['zero_crossing_rate']
+
+        # Pitch variation - CRITICAL INDICATOR (branchless bucket lookup)
+        ai_score = _PITCH_SCORES[np.searchsorted(_PITCH_THRESHOLDS, pitch_std, side='right')]
+
+        # Additional adjustments (skipped features contribute nothing)
         adjustments = 0.0
-        
-        # Spectral centroid
-        if 2500 < spectral_centroid < 3800:
-            adjustments += 0.10
-        
-        # Zero crossing rate
-        if 0.06 < zcr < 0.14:
-            adjustments += 0.05
-        
+        if spectral_centroid is not None:
+            adjustments += 0.10 * ((spectral_centroid > 2500) & (spectral_centroid < 3800))
+        if zcr is not None:
+            adjustments += 0.05 * ((zcr > 0.06) & (zcr < 0.14))
+
         final_score = ai_score + adjustments
         return max(0.0, min(1.0, final_score))
     
-    def _generate_explanation(self, is_ai, confidence, pitch_std, spectral_centroid):
-        """Generate explanation"""
+    def _generate_explanation(self, is_ai, confidence, features: dict):
+        """Generate explanation from the already-extracted features"""
+        pitch_std = features['pitch_std']
+        spectral_centroid = features['spectral_centroid']
+
         if is_ai:
             if confidence > 0.75:
+                # Centroid is skipped on the fast path; only mention it when known
+                centroid_clause = (
+                    f"spectral centroid at {spectral_centroid:.0f} Hz shows artificial patterns. "
+                    if spectral_centroid is not None else ""
+                )
                 return (
                     f"Strong AI characteristics detected: "
                     f"Extremely low pitch variation ({pitch_std:.1f} Hz indicates synthetic consistency), "
-                    f"spectral centroid at {spectral_centroid:.0f} Hz shows artificial patterns. "
+                    + centroid_clause +
                     f"Confidence: {confidence*100:.0f}%"
                 )
             elif confidence > 0.55:
@@ -130,6 +189,3 @@ class VoiceDetectionModel:
                     f"Slight human tendencies: "
                     f"Some natural characteristics present. Confidence: {confidence*100:.0f}%"
                 )
-
-# Initialize model
-voice_detector = VoiceDetectionModel()
\ No newline at end of file
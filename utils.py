@@ -1,57 +1,48 @@
-import base64
 import io
-import librosa
+import pybase64
 import soundfile as sf
+import soxr
 import numpy as np
 
+# 60 seconds at the 320 kbps MP3 ceiling (matches the documented max length)
+MAX_AUDIO_BYTES = 60 * 320_000 // 8
+
 def decode_base64_audio(base64_string: str) -> tuple:
     """
     Decode Base64 string to audio waveform
-    Returns: (waveform, sample_rate)
+    Returns: (waveform, sample_rate) with waveform as float32 mono
     """
     try:
-        # Decode Base64
-        audio_bytes = base64.b64decode(base64_string)
-        
-        # Load audio from bytes
+        # Reject oversized payloads before paying for the decode
+        if (len(base64_string) * 3) // 4 > MAX_AUDIO_BYTES:
+            raise ValueError("Audio exceeds the 60 second limit")
+
+        # Decode Base64 (SIMD-accelerated; validate=True keeps pybase64 on its fast
+        # path, and the bytearray variant skips the immutable bytes intermediate)
+        audio_bytes = pybase64.b64decode_as_bytearray(base64_string, validate=True)
+
+        # Load audio from bytes as float32 (halves memory traffic downstream)
         audio_io = io.BytesIO(audio_bytes)
-        waveform, sample_rate = sf.read(audio_io)
-        
-        # Convert to mono if stereo
+        waveform, sample_rate = sf.read(audio_io, dtype='float32', always_2d=False)
+
+        # Convert to mono if stereo (keep float32, no float64 promotion)
         if len(waveform.shape) > 1:
-            waveform = waveform.mean(axis=1)
+            waveform = waveform.mean(axis=1, dtype=np.float32)
         
         return waveform, sample_rate
         
     except Exception as e:
         raise ValueError(f"Failed to decode audio: {str(e)}")
 
-def extract_audio_features(waveform: np.ndarray, sr: int) -> tuple:
+def resample_audio(waveform: np.ndarray, sr: int) -> tuple:
     """
-    Extract acoustic features from audio
-    Returns: (features_dict, waveform, sample_rate)
+    Resample waveform to 16kHz (standard for speech models)
+    Returns: (waveform, sample_rate)
     """
-    # Resample to 16kHz (standard for speech models)
     if sr != 16000:
-        waveform = librosa.resample(waveform, orig_sr=sr, target_sr=16000)
+        waveform = soxr.resample(waveform, sr, 16000, quality='HQ').astype(
+            np.float32, copy=False
+        )
         sr = 16000
-    
-    features = {}
-    
-    # Spectral features
-    features['spectral_centroid'] = np.mean(
-        librosa.feature.spectral_centroid(y=waveform, sr=sr)
-    )
-    features['spectral_rolloff'] = np.mean(
-        librosa.feature.spectral_rolloff(y=waveform, sr=sr)
-    )
-    features['zero_crossing_rate'] = np.mean(
-        librosa.feature.zero_crossing_rate(waveform)
-    )
-    
-    # MFCCs (mel-frequency cepstral coefficients)
-    mfccs = librosa.feature.mfcc(y=waveform, sr=sr, n_mfcc=13)
-    features['mfcc_mean'] = np.mean(mfccs, axis=1)
-    features['mfcc_std'] = np.std(mfccs, axis=1)
-    
-    return features, waveform, sr
+
+    return waveform, sr